@@ -1,6 +1,9 @@
 from flask import Flask, request, send_file, jsonify
-import os
-from hybrid import hybrid_enhance
+import io
+import logging
+import cv2
+import numpy as np
+from hybrid import hybrid_enhance, encode_jpeg
 
 app = Flask(__name__)
 
@@ -9,20 +12,39 @@ def enhance():
     if 'image' not in request.files:
         return jsonify({'error': 'No image uploaded'}), 400
     file = request.files['image']
-    input_path = '/tmp/input.jpg'
-    output_path = '/tmp/output.jpg'
-    file.save(input_path)
+
+    data = file.read()
+    if not data:
+        return jsonify({'error': 'No image uploaded'}), 400
+
+    # Decode straight from the upload - no temp files on disk
+    try:
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    except cv2.error:
+        img = None
+    if img is None:
+        return jsonify({'error': 'Unable to decode image'}), 400
 
     # Get parameters from form or JSON
     gamma = float(request.form.get('gamma', 1.0))
     max_gain = float(request.form.get('max_gain', 5.0))
     denoise_strength = int(request.form.get('denoise_strength', 10))
     saturation_scale = float(request.form.get('saturation_scale', 1.0))
+    sharpen = float(request.form.get('sharpen', 0.5))
+    blend = float(request.form.get('blend', 0.8))
+    device = request.form.get('device', 'cpu')
+    if device not in ('cpu', 'cuda'):
+        return jsonify({'error': "Invalid device - use 'cpu' or 'cuda'"}), 400
 
-    success = hybrid_enhance(input_path, output_path, gamma=gamma, max_gain=max_gain, denoise_strength=denoise_strength, saturation_scale=saturation_scale)
-    if not success or not os.path.exists(output_path):
+    try:
+        enhanced_img = hybrid_enhance(img, gamma=gamma, max_gain=max_gain, denoise_strength=denoise_strength, saturation_scale=saturation_scale, sharpen=sharpen, blend=blend, device=device)
+        jpg = encode_jpeg(enhanced_img)
+    except Exception as e:
+        logging.error(f"Error enhancing upload: {e}")
         return jsonify({'error': 'Enhancement failed'}), 500
-    return send_file(output_path, mimetype='image/jpeg')
+
+    return send_file(io.BytesIO(jpg), mimetype='image/jpeg')
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8000) 
\ No newline at end of file
+    # Development server only - serve with `gunicorn app:app` (see gunicorn.conf.py) in production
+    app.run(host='0.0.0.0', port=8000, threaded=True)
@@ -0,0 +1,21 @@
+"""
+Gunicorn settings for the Flask enhancement API.
+Run from this directory with: gunicorn app:app
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+def post_fork(server, worker):
+    """
+    Tell each worker how many siblings it has before it imports the app: hybrid.py
+    sizes OpenCV's thread pool to cores / workers, and Numba's pool is sized the same
+    way so the processes don't oversubscribe the cores.
+    """
+    os.environ['GUNICORN_WORKERS'] = str(server.cfg.workers)
+    os.environ.setdefault('NUMBA_NUM_THREADS', str(max(1, multiprocessing.cpu_count() // server.cfg.workers)))
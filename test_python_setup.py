@@ -4,71 +4,111 @@ Test script to verify Python dependencies are properly installed.
 Run this script to check if all required libraries are available.
 """
 
+import platform
 import sys
+import timeit
+
+# Test pattern, built on first use and shared by every later call
+_TEST_IMG = None
+_TEST_GRAY = None
+_TEST_GRAY_F32 = None
+
+def _get_test_img(cv2, np):
+    """Return the cached (BGR uint8, gray uint8, gray float32) test pattern."""
+    global _TEST_IMG, _TEST_GRAY, _TEST_GRAY_F32
+    if _TEST_IMG is None:
+        _TEST_IMG = np.zeros((100, 100, 3), dtype=np.uint8)
+        _TEST_IMG[25:75, 25:75].fill(255)  # White square
+        _TEST_GRAY = cv2.cvtColor(_TEST_IMG, cv2.COLOR_BGR2GRAY)
+        _TEST_GRAY_F32 = _TEST_GRAY.astype(np.float32)
+    return _TEST_IMG, _TEST_GRAY, _TEST_GRAY_F32
 
 def test_imports():
-    """Test if all required libraries can be imported."""
+    """
+    Test if all required libraries can be imported.
+    Returns a dict of the imported modules (for the functionality test), or None on failure.
+    """
     print("Testing Python dependencies...")
     
     try:
         import cv2
         print(f"✓ OpenCV version: {cv2.__version__}")
         
-        # Test if ximgproc is available
-        if hasattr(cv2, 'ximgproc'):
+        # Test if ximgproc is available (resolve the contrib submodule once)
+        ximgproc = getattr(cv2, 'ximgproc', None)
+        if ximgproc is not None:
             print("✓ OpenCV ximgproc module available")
         else:
-            print("⚠ OpenCV ximgproc module not available (will use fallback)")
+            print("⚠ OpenCV ximgproc module not available (optional - the backend has its own guided filter)")
             
     except ImportError as e:
         print(f"✗ OpenCV import failed: {e}")
-        return False
+        return None
     
     try:
         import numpy as np
         print(f"✓ NumPy version: {np.__version__}")
     except ImportError as e:
         print(f"✗ NumPy import failed: {e}")
-        return False
+        return None
     
     try:
         from PIL import Image
         print(f"✓ PIL version: {Image.__version__}")
     except ImportError as e:
         print(f"✗ PIL import failed: {e}")
-        return False
+        return None
     
-    return True
+    return {'cv2': cv2, 'np': np}
 
-def test_opencv_functionality():
-    """Test basic OpenCV functionality."""
+def report_opencv_simd(cv2):
+    """Print the SIMD extensions OpenCV was built with and warn when AVX2 is missing on x86."""
+    cv2.setUseOptimized(True)
+    simd_lines = [line.strip() for line in cv2.getBuildInformation().splitlines()
+                  if any(k in line for k in ("CPU/HW features", "Baseline", "Dispatched", "NEON", "AVX", "SSE"))]
+    for line in simd_lines:
+        print(f"  {line}")
+    print(f"  UseOptimized: {cv2.useOptimized()}, Threads: {cv2.getNumThreads()}")
+    
+    if platform.machine().lower() in ('x86_64', 'amd64', 'i386', 'i686') and not any("AVX2" in line for line in simd_lines):
+        print("⚠ OpenCV was built without AVX2 - filters like filter2D can run 6-11x slower")
+
+def test_opencv_functionality(cv2=None, np=None):
+    """
+    Test basic OpenCV functionality, using the modules already imported by test_imports.
+    Imports them itself when called without arguments (e.g. when collected by pytest).
+    """
     print("\nTesting OpenCV functionality...")
     
     try:
-        import cv2
-        import numpy as np
-        
-        # Create a test image
-        test_img = np.zeros((100, 100, 3), dtype=np.uint8)
-        test_img[25:75, 25:75] = [255, 255, 255]  # White square
+        if cv2 is None or np is None:
+            import cv2
+            import numpy as np
         
-        # Test basic operations
-        gray = cv2.cvtColor(test_img, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        # Test basic operations on the (cached) test image
+        test_img, gray, gray_f32 = _get_test_img(cv2, np)
+        # Gaussian blur through the separable row/column filter path
+        kernel = cv2.getGaussianKernel(5, 0)
+        blurred = cv2.sepFilter2D(gray, -1, kernel, kernel)
+        # Box filter on float32 (the mean filter behind the guided filter)
+        boxed = cv2.boxFilter(gray_f32, -1, (5, 5))
         
         print("✓ Basic OpenCV operations working")
+        report_opencv_simd(cv2)
         
         # Test guided filter if available
-        if hasattr(cv2, 'ximgproc'):
+        ximgproc = getattr(cv2, 'ximgproc', None)
+        if ximgproc is not None:
             try:
-                guided = cv2.ximgproc.guidedFilter(gray.astype(np.float32), 
-                                                  gray.astype(np.float32), 
-                                                  5, 0.1)
+                # Build the filter once so the guide statistics are reused by every filter() call;
+                # one float32 copy serves as both guide and source
+                guided_filter = ximgproc.createGuidedFilter(gray_f32, 5, 0.1)
+                guided = guided_filter.filter(gray_f32)
                 print("✓ Guided filter working")
             except Exception as e:
                 print(f"⚠ Guided filter test failed: {e}")
         else:
-            print("⚠ Guided filter not available (will use bilateral filter)")
+            print("⚠ ximgproc guided filter not available (optional)")
             
         return True
         
@@ -76,6 +116,51 @@ def test_opencv_functionality():
         print(f"✗ OpenCV functionality test failed: {e}")
         return False
 
+def _bench(fn, *args, n=50):
+    """Best-of-3 seconds per call of fn(*args), each repeat averaging n calls."""
+    times = timeit.repeat(lambda: fn(*args), number=n, repeat=3)
+    return min(times) / n
+
+def _numpy_blur_reference(np, img, kernel_2d):
+    """NumPy 2-D convolution (pad + shifted slices) used as a reference timing."""
+    k = kernel_2d.shape[0]
+    r = k // 2
+    height, width = img.shape
+    padded = np.pad(img.astype(np.float32), r, mode='reflect')
+    out = np.zeros((height, width), dtype=np.float32)
+    for dy in range(k):
+        for dx in range(k):
+            out += kernel_2d[dy, dx] * padded[dy:dy + height, dx:dx + width]
+    return out.astype(np.uint8)
+
+def benchmark_opencv(cv2, np):
+    """Time core OpenCV filters on a 1080p frame and compare with a NumPy reference."""
+    print("\nBenchmarking OpenCV (1920x1080, best of 3)...")
+    
+    gray = np.zeros((1080, 1920), dtype=np.uint8)
+    gray[270:810, 480:1440].fill(255)
+    gray_f32 = gray.astype(np.float32)
+    kernel = cv2.getGaussianKernel(5, 0)
+    kernel_2d = (kernel @ kernel.T).astype(np.float32)
+    
+    blur_time = _bench(cv2.GaussianBlur, gray, (5, 5), 0)
+    print(f"  GaussianBlur 5x5 1080p: {blur_time * 1000:.2f} ms")
+    
+    # Same filter with OpenCV's optimized (SIMD) code paths switched off
+    cv2.setUseOptimized(False)
+    try:
+        scalar_time = _bench(cv2.GaussianBlur, gray, (5, 5), 0)
+    finally:
+        cv2.setUseOptimized(True)
+    print(f"  GaussianBlur 5x5 1080p, setUseOptimized(False): {scalar_time * 1000:.2f} ms "
+          f"(optimized is {scalar_time / blur_time:.1f}x faster)")
+    print(f"  sepFilter2D 5x5 1080p: {_bench(cv2.sepFilter2D, gray, -1, kernel, kernel) * 1000:.2f} ms")
+    print(f"  boxFilter 5x5 1080p (float32): {_bench(cv2.boxFilter, gray_f32, -1, (5, 5)) * 1000:.2f} ms")
+    
+    reference_time = _bench(_numpy_blur_reference, np, gray, kernel_2d, n=3)
+    print(f"  NumPy pad+slice reference: {reference_time * 1000:.2f} ms "
+          f"({reference_time / blur_time:.1f}x GaussianBlur)")
+
 def main():
     """Main test function."""
     print("=" * 50)
@@ -83,11 +168,13 @@ def main():
     print("=" * 50)
     
     # Test imports
-    imports_ok = test_imports()
+    modules = test_imports()
     
-    if imports_ok:
+    if modules:
         # Test functionality
-        functionality_ok = test_opencv_functionality()
+        functionality_ok = test_opencv_functionality(modules['cv2'], modules['np'])
+        if functionality_ok:
+            benchmark_opencv(modules['cv2'], modules['np'])
         
         print("\n" + "=" * 50)
         if functionality_ok: